@@ -24,6 +24,17 @@ LLM_MODEL = "qwen-turbo-2024-09-19"
 LLM_API_KEY = "Your Key"
 REFLECTION_INTERVAL = 3        
 
+# shared LLM scheduler used by all Simulation instances in this process
+LLM_SCHEDULER_ENABLED = True
+LLM_MAX_CONCURRENCY = 8
+LLM_RATE_LIMIT_RPM = 300       # requests per minute across all simulations, 0 = unlimited
+# share one LLM call between identical prompts in flight; agents with the same prompt then
+# get the same sampled decision instead of independent draws, so this is off by default
+LLM_COALESCE_PROMPTS = False
+# run the tax regimes on separate threads against the shared scheduler; the month loop draws
+# from the global random/np.random state, so results are not reproducible when this is on
+PARALLEL_SIMULATIONS = False
+
 BASELINE_TAX_RATES = {
     "us_federal": [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37],  
     "saez": [0.15, 0.20, 0.25, 0.30, 0.38, 0.45, 0.50],       
@@ -1,4 +1,5 @@
 import json
+from concurrent.futures import Future
 from dashscope import Generation 
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import config
@@ -15,8 +16,10 @@ def extract_json(text):
         obj, idx = decoder.raw_decode(text)
         return obj
 class HAgent:    
-    def __init__(self, agent_id):
+    def __init__(self, agent_id, scheduler=None, tenant=None):
         self.agent_id = agent_id
+        self.scheduler = scheduler
+        self.tenant = tenant
         self.age = np.random.randint(25, 65) 
         self.occupation = np.random.choice(["Newspaper Delivery", "Retail Sales", "Teacher", "Engineer", "Nurse"]) 
         self.savings = config.INIT_SAVINGS_PER_HH[agent_id]  
@@ -41,21 +44,7 @@ class HAgent:
         }
         self.memo.append(memo_entry)
 
-    @retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=2, max=15),
-    retry=retry_if_exception_type((
-        json.JSONDecodeError,
-        ConnectionError,
-        TypeError,
-        MaxRetryError,
-        SSLError,
-        KeyError,
-        ValueError
-    ))
-    )
-
-    def make_decision(self, month, env): 
+    def build_prompt(self, month, env):
         current_price = env.metrics.loc[month, "price"]
         current_interest = env.metrics.loc[month, "interest_rate"]
         current_tax_rates = env.metrics.loc[month, "tax_rates"]
@@ -81,13 +70,48 @@ class HAgent:
         If you violate this format, the result will be discarded.
 
         """
+        return prompt
 
-        response = Generation.call(
+    def _generate(self, prompt):
+        return Generation.call(
             model=config.LLM_MODEL,
             prompt=prompt,
             api_key=config.LLM_API_KEY,
             output_format="json"
         )
+
+    def request_decision(self, month, env):
+        # submit without waiting so a month's households can be in flight together
+        prompt = self.build_prompt(month, env)
+        if self.scheduler is None:
+            # no shared scheduler: call inline and hand back an already resolved future
+            future = Future()
+            try:
+                future.set_result(self._generate(prompt))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        key = ("generation", config.LLM_MODEL, prompt) if getattr(config, 'LLM_COALESCE_PROMPTS', False) else None
+        return self.scheduler.submit(self.tenant, lambda: self._generate(prompt), key=key)
+
+    @retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=15),
+    retry=retry_if_exception_type((
+        json.JSONDecodeError,
+        ConnectionError,
+        TypeError,
+        MaxRetryError,
+        SSLError,
+        KeyError,
+        ValueError
+    ))
+    )
+
+    def make_decision(self, month, env): 
+        self.apply_decision(month, self.request_decision(month, env).result())
+
+    def apply_decision(self, month, response):
     # --------- 1. 防御式检查 LLM 返回 ---------
         if response is None:
             raise ValueError("LLM returned None response")
@@ -69,8 +69,14 @@ def call_llm(prompt: str, system: str | None = None, model: str | None = None) -
         raise RuntimeError(f'Unsupported LLM provider: {provider}')
 
 
-def call_llm_json(prompt: str, system: str | None = None, model: str | None = None):
-    text = call_llm(prompt, system=system, model=model)
+def call_llm_json(prompt: str, system: str | None = None, model: str | None = None, scheduler=None, tenant=None):
+    if scheduler is not None:
+        key = None
+        if getattr(config, 'LLM_COALESCE_PROMPTS', False):
+            key = ('call_llm', model or config.LLM_MODEL, system, prompt)
+        text = scheduler.run(tenant, lambda: call_llm(prompt, system=system, model=model), key=key)
+    else:
+        text = call_llm(prompt, system=system, model=model)
     try:
         return json.loads(text)
     except Exception:
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import config
+
+
+class _Job:
+    def __init__(self, tenant, key, fn):
+        self.tenant = tenant
+        self.key = key
+        self.fn = fn
+        self.future = Future()
+
+
+class LLMScheduler:
+    """
+    Shared in-process scheduler for LLM calls issued by many Simulation instances.
+
+    Requests are queued per tenant and dispatched round-robin across tenants,
+    bounded by a global concurrency limit and a requests-per-minute rate.
+    Identical requests (same key) that are queued or in flight share one call.
+    """
+
+    def __init__(self, max_concurrency: int | None = None, rate_limit_rpm: float | None = None):
+        self.max_concurrency = max_concurrency or getattr(config, 'LLM_MAX_CONCURRENCY', 8)
+        self.rate_limit_rpm = rate_limit_rpm if rate_limit_rpm is not None else getattr(config, 'LLM_RATE_LIMIT_RPM', 0)
+
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._tenants = deque()
+        self._inflight = {}
+        self._running = 0
+        self._closed = False
+
+        # token bucket; a non-positive rate disables rate limiting
+        self._tokens = float(self.max_concurrency)
+        self._last_refill = time.monotonic()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm-worker')
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='llm-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, tenant, fn, key=None) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('LLMScheduler is closed')
+            if key is not None and key in self._inflight:
+                return self._inflight[key].future
+            job = _Job(tenant, key, fn)
+            if tenant not in self._queues:
+                self._queues[tenant] = deque()
+                self._tenants.append(tenant)
+            self._queues[tenant].append(job)
+            if key is not None:
+                self._inflight[key] = job
+            self._cond.notify_all()
+            return job.future
+
+    def run(self, tenant, fn, key=None):
+        return self.submit(tenant, fn, key=key).result()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _has_pending(self):
+        # only tenants with queued jobs are kept in _tenants
+        return bool(self._tenants)
+
+    def _refill_tokens(self):
+        now = time.monotonic()
+        if self.rate_limit_rpm > 0:
+            rate = self.rate_limit_rpm / 60.0
+            self._tokens = min(float(self.max_concurrency), self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+
+    def _wait_time(self):
+        if self.rate_limit_rpm <= 0 or self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) * 60.0 / self.rate_limit_rpm
+
+    def _next_batch(self):
+        # round-robin across tenants so one large run cannot starve the others
+        batch = []
+        limit = self.max_concurrency - self._running
+        while len(batch) < limit and self._tenants:
+            if self.rate_limit_rpm > 0 and self._tokens < 1.0:
+                break
+            tenant = self._tenants.popleft()
+            queue = self._queues[tenant]
+            batch.append(queue.popleft())
+            if queue:
+                self._tenants.append(tenant)
+            else:
+                # drained tenants are forgotten so long sweeps do not accumulate them
+                del self._queues[tenant]
+            if self.rate_limit_rpm > 0:
+                self._tokens -= 1.0
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._has_pending():
+                        return
+                    self._refill_tokens()
+                    if self._has_pending() and self._running < self.max_concurrency:
+                        wait = self._wait_time()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+                batch = self._next_batch()
+                self._running += len(batch)
+            for job in batch:
+                self._executor.submit(self._execute, job)
+
+    def _execute(self, job):
+        try:
+            outcome = None
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    outcome = (True, job.fn())
+                except BaseException as e:
+                    outcome = (False, e)
+            # release the key before resolving, so a waiter that retries at once gets a fresh call
+            with self._cond:
+                if job.key is not None and self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+            if outcome is not None:
+                ok, value = outcome
+                if ok:
+                    job.future.set_result(value)
+                else:
+                    job.future.set_exception(value)
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = LLMScheduler()
+        return _default_scheduler
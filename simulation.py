@@ -1,15 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 import config
 from config import NUM_HOUSEHOLDS, SIMULATION_MONTHS
 from macro_env import MacroeconomicEnvironment 
 from h_agent import HAgent  
 from tax_agent import TaxAgent  
+from llm_scheduler import get_scheduler
 
 class Simulation:
-    def __init__(self):
-        self.env = MacroeconomicEnvironment()
-        self.h_agents = [HAgent(i) for i in range(NUM_HOUSEHOLDS)]
-        self.tax_agent = TaxAgent()
+    def __init__(self, scheduler=None, tenant=None):
+        if scheduler is None and getattr(config, 'LLM_SCHEDULER_ENABLED', False):
+            scheduler = get_scheduler()
+        self.scheduler = scheduler
+        self.tenant = tenant if tenant is not None else f"sim-{id(self)}"
+        # built on first use so a coordinating instance does not allocate agents it never runs
+        self.env = None
+        self.h_agents = []
+        self.tax_agent = None
 
         self.baseline_tax_rates = {
             "us_federal": [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37],  
@@ -17,7 +24,20 @@ class Simulation:
             "free_market": [0.00, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00]  
         }
 
+    def reset(self, tenant=None):
+        # tenant only labels the rebuilt agents; self.tenant stays this instance's own name
+        tenant = tenant if tenant is not None else self.tenant
+        self.env = MacroeconomicEnvironment()
+        self.h_agents = [HAgent(i, scheduler=self.scheduler, tenant=tenant) for i in range(NUM_HOUSEHOLDS)]
+        self.tax_agent = TaxAgent(scheduler=self.scheduler, tenant=tenant)
+
+    def regime_tenant(self, tax_system):
+        # scoped to this instance so concurrent sweeps over the same regime stay separate tenants
+        return f"{self.tenant}/{tax_system}"
+
     def run_single_month(self, month, tax_system="tax_agent"):
+        if self.env is None:
+            self.reset()
   
         if tax_system == "tax_agent":
             if month == 0:
@@ -33,8 +53,18 @@ class Simulation:
             self.env.metrics.at[month, "tax_rates"] = self.baseline_tax_rates[tax_system]
 
     
-        for agent in self.h_agents:
-            agent.make_decision(month, self.env)
+        if self.scheduler is not None:
+            # households decide independently, so put the whole month in flight before waiting
+            futures = [agent.request_decision(month, self.env) for agent in self.h_agents]
+            for agent, future in zip(self.h_agents, futures):
+                try:
+                    agent.apply_decision(month, future.result())
+                except Exception:
+                    # fall back to the agent's own retrying path for this household only
+                    agent.make_decision(month, self.env)
+        else:
+            for agent in self.h_agents:
+                agent.make_decision(month, self.env)
 
 
         total_labor = self.env.calculate_total_labor_supply(self.h_agents)
@@ -62,23 +92,39 @@ class Simulation:
         for agent in self.h_agents:
             agent.self_reflect(month)
 
+    def run_regime(self, tax_system):
+        print(f"Running simulation for {tax_system}...")
+        self.reset(tenant=self.regime_tenant(tax_system))
+        return self._run_months(tax_system)
+
+    def _run_months(self, tax_system):
+        for month in range(SIMULATION_MONTHS):
+            self.run_single_month(month, tax_system)
+        return self.env.metrics.copy()
+
     def run_full_simulation(self):
       
+        tax_systems = ["tax_agent", "us_federal", "saez", "free_market"]
         results = {}
-   
-        for tax_system in ["tax_agent", "us_federal", "saez", "free_market"]:
-            print(f"Running simulation for {tax_system}...")
-           
-            self.env = MacroeconomicEnvironment()
-            self.h_agents = [HAgent(i) for i in range(NUM_HOUSEHOLDS)]
-            self.tax_agent = TaxAgent()
-
-          
-            for month in range(SIMULATION_MONTHS):
-                self.run_single_month(month, tax_system)
 
-      
-            results[tax_system] = self.env.metrics.copy()
+        if getattr(config, 'PARALLEL_SIMULATIONS', False) and self.scheduler is not None:
+            # one Simulation per regime, all submitting to the same scheduler; every regime draws
+            # from the global RNG, so households and results differ from a sequential run
+            sims = []
+            for tax_system in tax_systems:
+                print(f"Running simulation for {tax_system}...")
+                sim = Simulation(scheduler=self.scheduler, tenant=self.regime_tenant(tax_system))
+                sim.reset()
+                sims.append(sim)
+            with ThreadPoolExecutor(max_workers=len(tax_systems)) as pool:
+                futures = [pool.submit(sim._run_months, t) for sim, t in zip(sims, tax_systems)]
+                for tax_system, future in zip(tax_systems, futures):
+                    results[tax_system] = future.result()
+            # leave the last regime's state on this instance, as the sequential path does
+            self.env, self.h_agents, self.tax_agent = sims[-1].env, sims[-1].h_agents, sims[-1].tax_agent
+        else:
+            for tax_system in tax_systems:
+                results[tax_system] = self.run_regime(tax_system)
 
         
         self.visualize_results(results)
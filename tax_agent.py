@@ -5,7 +5,9 @@ from llm_client import call_llm_json
 
 
 class TaxAgent:
-    def __init__(self):
+    def __init__(self, scheduler=None, tenant=None):
+        self.scheduler = scheduler
+        self.tenant = tenant
         self.tax_history = []
         self.theta_G = {"target_equality": 0.7, "target_productivity": 50000}
         self.theta_H = {"avg_hh_income": 0.0}
@@ -32,7 +34,8 @@ class TaxAgent:
                 Provide ONLY a list of 7 tax rates (JSON format). No other content!
                 Example: [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]
                 """
-                tax_rates = call_llm_json(prompt, model=getattr(config, 'LLM_MODEL', None))
+                tax_rates = call_llm_json(prompt, model=getattr(config, 'LLM_MODEL', None),
+                                          scheduler=self.scheduler, tenant=self.tenant)
                 if isinstance(tax_rates, list) and len(tax_rates) >= len(TAX_BRACKETS):
                     tax_rates = [min(max(round(float(r), 2), 0.0), 0.99) for r in tax_rates[:len(TAX_BRACKETS)]]
                     self.tax_history.append({"month": month, "rates": tax_rates})
@@ -0,0 +1,212 @@
+import threading
+import time
+
+import pytest
+
+import config
+import llm_client
+from llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        kwargs.setdefault('rate_limit_rpm', 0)
+        scheduler = LLMScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def test_concurrency_is_capped(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=3)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def job():
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        return True
+
+    futures = [scheduler.submit(f'sim-{i % 4}', job) for i in range(20)]
+    assert all(f.result(timeout=5) for f in futures)
+    assert state['peak'] == 3
+
+
+def test_tenants_are_served_round_robin(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=1)
+    gate = threading.Event()
+    order = []
+
+    blocker = scheduler.submit('blocker', gate.wait)
+    futures = []
+    for i in range(3):
+        futures.append(scheduler.submit('a', lambda i=i: order.append(('a', i))))
+    for i in range(3):
+        futures.append(scheduler.submit('b', lambda i=i: order.append(('b', i))))
+    gate.set()
+    blocker.result(timeout=5)
+    for f in futures:
+        f.result(timeout=5)
+
+    assert order == [('a', 0), ('b', 0), ('a', 1), ('b', 1), ('a', 2), ('b', 2)]
+
+
+def test_identical_keys_share_one_call(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=2)
+    gate = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        gate.wait()
+        return 'decision'
+
+    futures = [scheduler.submit(f'sim-{i}', job, key='prompt') for i in range(5)]
+    gate.set()
+
+    assert [f.result(timeout=5) for f in futures] == ['decision'] * 5
+    assert len(calls) == 1
+
+
+def test_key_none_is_never_coalesced(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=2)
+    calls = []
+
+    futures = [scheduler.submit('sim', lambda: calls.append(1)) for _ in range(5)]
+    for f in futures:
+        f.result(timeout=5)
+    assert len(calls) == 5
+
+
+def test_exception_reaches_all_coalesced_waiters(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=1)
+    gate = threading.Event()
+
+    def job():
+        gate.wait()
+        raise ValueError('bad LLM output')
+
+    futures = [scheduler.submit(f'sim-{i}', job, key='prompt') for i in range(3)]
+    gate.set()
+
+    for f in futures:
+        with pytest.raises(ValueError, match='bad LLM output'):
+            f.result(timeout=5)
+    # a finished key is released, so a retry issues a fresh call
+    assert scheduler.run('sim-0', lambda: 'retried', key='prompt') == 'retried'
+
+
+def test_key_is_released_before_waiters_see_the_failure(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=1)
+    gate = threading.Event()
+    retried = []
+
+    def job():
+        gate.wait()
+        raise ValueError('bad LLM output')
+
+    def retry_at_once(future):
+        # done callbacks run on the worker thread as the future resolves
+        retried.append(scheduler.submit('sim-0', lambda: 'retried', key='prompt'))
+
+    failed = scheduler.submit('sim-0', job, key='prompt')
+    failed.add_done_callback(retry_at_once)
+    gate.set()
+
+    with pytest.raises(ValueError):
+        failed.result(timeout=5)
+    assert retried[0] is not failed
+    assert retried[0].result(timeout=5) == 'retried'
+
+
+def test_rate_limit_paces_requests(make_scheduler):
+    # 600 rpm is one request per 0.1s once the initial burst of max_concurrency tokens is spent
+    scheduler = make_scheduler(max_concurrency=2, rate_limit_rpm=600)
+
+    start = time.monotonic()
+    futures = [scheduler.submit('sim', lambda: time.monotonic()) for _ in range(6)]
+    finished = [f.result(timeout=5) for f in futures]
+
+    assert max(finished) - start >= 0.35
+
+
+def test_drained_tenants_are_forgotten(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=2)
+
+    for i in range(50):
+        scheduler.run(f'sim-{i}', lambda: None)
+
+    assert not scheduler._queues
+    assert not scheduler._tenants
+
+
+def test_submit_after_close_raises(make_scheduler):
+    scheduler = make_scheduler(max_concurrency=1)
+    scheduler.close()
+
+    with pytest.raises(RuntimeError):
+        scheduler.submit('sim', lambda: None)
+
+
+def test_call_llm_json_routes_through_scheduler(make_scheduler, monkeypatch):
+    scheduler = make_scheduler(max_concurrency=2)
+    tenants = []
+    submit = scheduler.submit
+
+    def recording_submit(tenant, fn, key=None):
+        tenants.append((tenant, key))
+        return submit(tenant, fn, key=key)
+
+    monkeypatch.setattr(scheduler, 'submit', recording_submit)
+    monkeypatch.setattr(config, 'LLM_COALESCE_PROMPTS', False)
+    monkeypatch.setattr(llm_client, 'call_llm', lambda prompt, system=None, model=None: 'Rates: [0.1, 0.2]')
+
+    rates = llm_client.call_llm_json('prompt', scheduler=scheduler, tenant='run-a/tax_agent')
+
+    assert rates == [0.1, 0.2]
+    assert tenants == [('run-a/tax_agent', None)]
+
+
+def test_call_llm_json_coalesces_only_when_enabled(make_scheduler, monkeypatch):
+    scheduler = make_scheduler(max_concurrency=2)
+    gate = threading.Event()
+    calls = []
+    submitted = threading.Semaphore(0)
+    submit = scheduler.submit
+
+    def counting_submit(tenant, fn, key=None):
+        future = submit(tenant, fn, key=key)
+        submitted.release()
+        return future
+
+    def call_llm(prompt, system=None, model=None):
+        calls.append(prompt)
+        gate.wait()
+        return '[0.1]'
+
+    monkeypatch.setattr(scheduler, 'submit', counting_submit)
+    monkeypatch.setattr(config, 'LLM_COALESCE_PROMPTS', True)
+    monkeypatch.setattr(llm_client, 'call_llm', call_llm)
+
+    threads = [threading.Thread(target=llm_client.call_llm_json, args=('prompt',),
+                                kwargs={'scheduler': scheduler, 'tenant': f'sim-{i}'}) for i in range(3)]
+    for t in threads:
+        t.start()
+    # every caller has submitted while the shared call is still blocked
+    for _ in threads:
+        assert submitted.acquire(timeout=5)
+    gate.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert calls == ['prompt']
@@ -0,0 +1,92 @@
+import types
+
+import pytest
+
+import h_agent
+import simulation
+import tax_agent
+from llm_scheduler import LLMScheduler
+from macro_env import MacroeconomicEnvironment
+
+
+def _response(text):
+    return types.SimpleNamespace(output={"text": text})
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = LLMScheduler(max_concurrency=4, rate_limit_rpm=0)
+    yield scheduler
+    scheduler.close()
+
+
+@pytest.fixture
+def small_run(monkeypatch):
+    monkeypatch.setattr(simulation, "NUM_HOUSEHOLDS", 3)
+    monkeypatch.setattr(simulation, "SIMULATION_MONTHS", 1)
+    monkeypatch.setattr(tax_agent, "NUM_HOUSEHOLDS", 3)
+    monkeypatch.setattr(h_agent.Generation, "call",
+                        staticmethod(lambda **kwargs: _response('{"work": 0.6, "consumption": 0.4}')))
+
+
+def test_same_regime_in_two_instances_uses_distinct_tenants(small_run, scheduler):
+    first = simulation.Simulation(scheduler=scheduler, tenant="seed-1")
+    second = simulation.Simulation(scheduler=scheduler, tenant="seed-2")
+
+    first.run_regime("saez")
+    second.run_regime("saez")
+
+    assert first.tenant == "seed-1"
+    assert {a.tenant for a in first.h_agents} == {"seed-1/saez"}
+    assert {a.tenant for a in second.h_agents} == {"seed-2/saez"}
+    assert first.tax_agent.tenant != second.tax_agent.tenant
+
+
+def test_default_tenants_are_scoped_per_instance(small_run, scheduler):
+    first = simulation.Simulation(scheduler=scheduler)
+    second = simulation.Simulation(scheduler=scheduler)
+
+    assert first.regime_tenant("saez") != second.regime_tenant("saez")
+
+
+def _decision(work, consumption):
+    return _response(f'{{"work": {work}, "consumption": {consumption}}}')
+
+
+@pytest.mark.parametrize("use_scheduler", [True, False])
+def test_request_then_apply_decision(small_run, scheduler, use_scheduler):
+    agent = h_agent.HAgent(0, scheduler=scheduler if use_scheduler else None, tenant="run-a/saez")
+    env = MacroeconomicEnvironment()
+
+    future = agent.request_decision(0, env)
+    agent.apply_decision(0, future.result(timeout=5))
+
+    assert (agent.p_w, agent.p_c) == (0.6, 0.4)
+    assert [entry["month"] for entry in agent.memo] == [0]
+
+
+def test_bad_response_falls_back_for_that_household_only(small_run, scheduler):
+    sim = simulation.Simulation(scheduler=scheduler, tenant="run-a")
+    sim.reset(tenant=sim.regime_tenant("saez"))
+    applied = []
+    calls = {agent.agent_id: 0 for agent in sim.h_agents}
+
+    for agent in sim.h_agents:
+        def generate(prompt, agent=agent):
+            calls[agent.agent_id] += 1
+            if agent.agent_id == 1 and calls[1] == 1:
+                return _response("not json")
+            return _decision(0.1 * (agent.agent_id + 1), 0.5)
+
+        def add_to_memo(month, agent=agent, original=agent.add_to_memo):
+            applied.append(agent.agent_id)
+            original(month)
+
+        agent._generate = generate
+        agent.add_to_memo = add_to_memo
+
+    sim.run_single_month(0, "saez")
+
+    assert applied == [0, 1, 2]
+    assert calls == {0: 1, 1: 2, 2: 1}
+    assert [agent.p_w for agent in sim.h_agents] == [0.1, 0.2, 0.3]